@@ -4,19 +4,45 @@ GUI-приложение: ShellEmulator — REPL с поддержкой VFS.
 Добавлены команды rmdir и cp (все модификации VFS только в памяти).
 """
 
+import codecs
 import time
+from collections import OrderedDict, deque
 import getpass
 import os
+import queue
+import re
 import socket
-import base64
+import threading
 import tkinter as tk
 from tkinter import scrolledtext
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-from vfs import VFSDirectory, VFSFile, VFSNode, load_vfs_from_xml, resolve_path, split_path, resolve_parent
+from vfs import (VFSDirectory, VFSFile, VFSNode, load_vfs_from_xml, resolve_path, normalize_path, resolve_parent,
+                 resolve_with_parent, b64encode_str)
+
+# байты ASCII, которые не считаются печатаемыми в cat (всё, кроме 32..126 и \n\r\t)
+_NONPRINTABLE_BYTES = bytes(b for b in range(128) if not (32 <= b < 127 or b in b'\n\r\t'))
+# сколько байт с начала файла cat проверяет на UTF-8 до полного декодирования
+_SNIFF_SIZE = 4096
+# строки стартового скрипта, которые выполняются: все, кроме пустых и комментариев (#);
+# строка берётся целиком, без '\n'
+_SCRIPT_LINE_RE = re.compile(r'^(?!\s*(?:#|$)).+', re.M)
+
+# Команды (добавлены rmdir и cp): имя -> метод cmd_<имя>; порядок — для подсказки
+_COMMAND_NAMES = ('ls', 'cd', 'cat', 'vfsinfo', 'uptime', 'whoami', 'rmdir', 'cp', 'exit')
+_COMMANDS_HELP = ', '.join(_COMMAND_NAMES)
 
 
 class ShellEmulator(tk.Tk):
+    # максимальное число строк в окне вывода — старые строки удаляются
+    MAX_LINES = 5000
+    # размер кэша разрешённых путей (ключ — (cwd, path))
+    RESOLVE_CACHE_SIZE = 1024
+    # задержка между строками стартового скрипта, мс
+    SCRIPT_DELAY_MS = 300
+    # период опроса очереди фоновой загрузки скрипта, мс
+    SCRIPT_POLL_MS = 50
+
     def __init__(self, vfs_path: Optional[str] = None, startup_script: Optional[str] = None):
         """
         Инициализация GUI и состояния.
@@ -30,17 +56,24 @@ class ShellEmulator(tk.Tk):
 
         # отметка времени запуска эмулятора — используется для uptime
         self.start_time = time.time()
+        # /proc/uptime открываем один раз и перечитываем с нулевого смещения (нет на не-Linux системах)
+        try:
+            self._uptime_fd: Optional[int] = os.open('/proc/uptime', os.O_RDONLY)
+        except OSError:
+            self._uptime_fd = None
 
         # Заголовок/пользователь/хост
         self.username = getpass.getuser()
         self.hostname = socket.gethostname()
         self.title(f"Эмулятор - [{self.username}@{self.hostname}]")
+        # строка приглашения не меняется за сессию — формируем один раз
+        self._prompt = f"{self.username}@{self.hostname}:~$ "
         self.geometry("820x520")
 
         # Строка ввода (фрейм)
         entry_frame = tk.Frame(self)
         entry_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
-        prompt = tk.Label(entry_frame, text=f"{self.username}@{self.hostname}:~$ ")
+        prompt = tk.Label(entry_frame, text=self._prompt)
         prompt.pack(side=tk.LEFT)
         self.input_var = tk.StringVar()
         self.entry = tk.Entry(entry_frame, textvariable=self.input_var)
@@ -51,23 +84,15 @@ class ShellEmulator(tk.Tk):
         # Область вывода
         self.output = scrolledtext.ScrolledText(self, wrap=tk.WORD, state=tk.DISABLED)
         self.output.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        # Команды (добавлены rmdir и cp)
-        self.commands = {
-            'ls': self.cmd_ls,
-            'cd': self.cmd_cd,
-            'cat': self.cmd_cat,
-            'vfsinfo': self.cmd_vfsinfo,
-            'uptime': self.cmd_uptime,
-            'whoami': self.cmd_whoami,
-            'rmdir': self.cmd_rmdir,
-            'cp': self.cmd_cp,
-            'exit': self.cmd_exit,
-        }
+        self._line_count = 0
+        # вывод команды копится в _pending и выводится одной вставкой в _flush() после её завершения
+        self._pending: List[str] = []
+        self._batching = False
 
         # VFS state
         self.vfs_root: Optional[VFSDirectory] = None
-        self.cwd: List[str] = []
+        # текущая директория — кортеж компонентов от корня (неизменяемый, годится как ключ кэша)
+        self.cwd: Tuple[str, ...] = ()
 
         # Попытка загрузки VFS
         if self.vfs_path:
@@ -77,16 +102,27 @@ class ShellEmulator(tk.Tk):
             except Exception as e:
                 self.write_output(f"Ошибка загрузки VFS: {e}")
                 self.vfs_root = None
+        # кэш текущей директории: узел и строковое представление пути
+        self._cwd_node: Optional[VFSDirectory] = self.vfs_root
+        self._cwd_str = '/'
+        self._resolve_cache: "OrderedDict[tuple, Optional[VFSNode]]" = OrderedDict()
+        # узлы по нормализованному абсолютному пути (кортеж компонентов), включая предков
+        self._node_cache: Dict[Tuple[str, ...], VFSNode] = {}
+        # кэш статистики vfsinfo: (директории, файлы, макс. глубина)
+        self._vfs_stats: Optional[Tuple[int, int, int]] = None
 
         # Отладочный вывод параметров
-        self.write_output("=== debug: параметры запуска ===")
-        self.write_output(f"VFS путь: {self.vfs_path}")
-        self.write_output(f"Стартовый скрипт: {self.startup_script}")
-        self.write_output("================================")
-
-        self.write_output("Это эмулятор командной строки с VFS. Напишите exit для выхода")
-
-        # Запустить стартовый скрипт при наличии
+        self.write_output_many([
+            "=== debug: параметры запуска ===",
+            f"VFS путь: {self.vfs_path}",
+            f"Стартовый скрипт: {self.startup_script}",
+            "================================",
+            "Это эмулятор командной строки с VFS. Напишите exit для выхода",
+        ])
+
+        # Запустить стартовый скрипт при наличии (строки выполняются по очереди)
+        self._script_queue: "deque[str]" = deque()
+        self._script_load_q: "queue.Queue[tuple]" = queue.Queue()
         if self.startup_script:
             if os.path.isfile(self.startup_script):
                 self.after(200, lambda: self.run_startup_script(self.startup_script))
@@ -96,8 +132,34 @@ class ShellEmulator(tk.Tk):
     # --- UI helper ---
     def write_output(self, text: str):
         """Добавление текста в окно вывода."""
+        self.write_output_many([text])
+
+    def write_output_many(self, lines: Iterable[str]):
+        """Добавление нескольких строк в окно вывода одной вставкой (один проход через Tcl/Tk)."""
+        self.write_output_block('\n'.join(lines) + '\n')
+
+    def write_output_block(self, text: str):
+        """Добавление готового блока текста (уже разбитого на строки, с '\\n' в конце).
+        Во время выполнения команды текст копится до _flush(), иначе выводится сразу.
+        """
+        self._pending.append(text)
+        if not self._batching:
+            self._flush()
+
+    def _flush(self):
+        """Вывести накопленный текст одной вставкой: configure/insert/see — по одному разу на команду."""
+        if not self._pending:
+            return
+        text = ''.join(self._pending)
+        self._pending.clear()
         self.output.configure(state=tk.NORMAL)
-        self.output.insert(tk.END, text + '\n')
+        self.output.insert(tk.END, text)
+        self._line_count += text.count('\n')
+        if self._line_count > self.MAX_LINES:
+            # обрезаем начало, чтобы история не росла бесконечно
+            excess = self._line_count - self.MAX_LINES
+            self.output.delete('1.0', f'{excess + 1}.0')
+            self._line_count -= excess
         self.output.see(tk.END)
         self.output.configure(state=tk.DISABLED)
 
@@ -109,18 +171,35 @@ class ShellEmulator(tk.Tk):
         line = line.strip()
         if not line:
             return
-        self.write_output(f"{self.username}@{self.hostname}:~$ {line}")
-        parts = line.split()
-        cmd = parts[0]
-        args = parts[1:]
-        handler = self.commands.get(cmd)
-        if handler:
-            try:
-                handler(args)
-            except Exception as e:
-                self.write_output(f"Ошибка выполнения команды '{cmd}': {e}")
-        else:
-            self.write_output(f"Неизвестная команда: {cmd}. Доступные: {', '.join(self.commands.keys())}")
+        self._dispatch(line)
+
+    def _dispatch(self, line: str, script: bool = False):
+        """Общий путь для ручного ввода и скрипта: эхо, парсинг и выполнение команды.
+        script=True меняет тексты ошибок (строка из стартового скрипта пропускается).
+        """
+        self._batching = True
+        try:
+            self.write_output(self._prompt + line)
+            # отделяем только имя команды; аргументы разбираем, если команда известна
+            parts = line.split(None, 1)
+            if not parts:
+                return
+            cmd = parts[0]
+            handler = _HANDLERS.get(cmd)
+            if handler:
+                args = parts[1].split() if len(parts) > 1 else []
+                try:
+                    handler(self, args)
+                except Exception as e:
+                    where = " в скрипте" if script else ""
+                    self.write_output(f"Ошибка выполнения команды '{cmd}'{where}: {e}")
+            elif script:
+                self.write_output(f"Неизвестная команда в скрипте: {cmd}. Пропускаю строку.")
+            else:
+                self.write_output(f"Неизвестная команда: {cmd}. Доступные: {_COMMANDS_HELP}")
+        finally:
+            self._batching = False
+            self._flush()
 
     # --- VFS helpers ---
     def vfs_resolve(self, path: str):
@@ -128,7 +207,16 @@ class ShellEmulator(tk.Tk):
         if not self.vfs_root:
             self.write_output("VFS не загружен.")
             return None
-        return resolve_path(self.vfs_root, self.cwd, path)
+        key = (self.cwd, path)
+        cache = self._resolve_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        node = resolve_path(self.vfs_root, self.cwd, path, self._node_cache)
+        cache[key] = node
+        if len(cache) > self.RESOLVE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return node
 
     def vfs_change_dir(self, path: str) -> bool:
         """Поменять текущую директорию (cwd)."""
@@ -136,27 +224,26 @@ class ShellEmulator(tk.Tk):
             self.write_output("VFS не загружен.")
             return False
         if path == '/':
-            self.cwd = []
+            self._set_cwd((), self.vfs_root)
             return True
         node = self.vfs_resolve(path)
-        if node is None or not isinstance(node, VFSDirectory):
+        if type(node) is not VFSDirectory:
             return False
-        if path.startswith('/'):
-            self.cwd = split_path(path)
-        else:
-            comps = list(self.cwd) + split_path(path)
-            stack: List[str] = []
-            for c in comps:
-                if c == '..':
-                    if stack:
-                        stack.pop()
-                elif c == '.':
-                    continue
-                else:
-                    stack.append(c)
-            self.cwd = stack
+        self._set_cwd(normalize_path(self.cwd, path), node)
         return True
 
+    def _vfs_changed(self):
+        """Сбросить кэши, зависящие от структуры VFS (вызывается после rmdir/cp)."""
+        self._resolve_cache.clear()
+        self._node_cache.clear()
+        self._vfs_stats = None
+
+    def _set_cwd(self, comps: Sequence[str], node: VFSDirectory):
+        """Обновить cwd вместе с кэшем узла и строки пути."""
+        self.cwd = tuple(comps)
+        self._cwd_node = node
+        self._cwd_str = '/' + '/'.join(comps) if comps else '/'
+
     # --- команды базовые (ls, cd, cat, vfsinfo, uptime, whoami) ---
     def cmd_ls(self, args: List[str]):
         """ls: перечислить содержимое директории или показать файл."""
@@ -165,18 +252,14 @@ class ShellEmulator(tk.Tk):
             if not self.vfs_root:
                 self.write_output("VFS не загружен.")
                 return
-            cur_path = '/' + '/'.join(self.cwd) if self.cwd else '/'
-            node = resolve_path(self.vfs_root, self.cwd, cur_path)
+            node = self._cwd_node
         else:
             node = self.vfs_resolve(target)
         if node is None:
             self.write_output(f"ls: путь не найден: {target}")
             return
-        if isinstance(node, VFSDirectory):
-            names = []
-            for name, child in sorted(node.children.items()):
-                names.append(name + ('/' if isinstance(child, VFSDirectory) else ''))
-            self.write_output('  '.join(names) if names else '(пустая директория)')
+        if type(node) is VFSDirectory:
+            self.write_output(node.listing() or '(пустая директория)')
         else:
             self.write_output(node.name)
 
@@ -192,8 +275,7 @@ class ShellEmulator(tk.Tk):
         path = args[0]
         ok = self.vfs_change_dir(path)
         if ok:
-            cur = '/' + '/'.join(self.cwd) if self.cwd else '/'
-            self.write_output(f"Тек. директория: {cur}")
+            self.write_output(f"Тек. директория: {self._cwd_str}")
         else:
             self.write_output(f"cd: путь не найден или не является директорией: {path}")
 
@@ -209,11 +291,10 @@ class ShellEmulator(tk.Tk):
         if node is None:
             self.write_output(f"cat: файл не найден: {args[0]}")
             return
-        if isinstance(node, VFSDirectory):
+        if type(node) is VFSDirectory:
             self.write_output(f"cat: {args[0]}: это директория")
             return
         # node — VFSFile
-        assert isinstance(node, VFSFile)
         data = node.data
 
         # пустой файл — явно показываем
@@ -222,56 +303,77 @@ class ShellEmulator(tk.Tk):
             return
 
         # попробуем декодировать в utf-8
-        try:
-            text = data.decode('utf-8')
-        except Exception:
-            # не текст — покажем base64
-            b64 = base64.b64encode(data).decode('ascii')
-            self.write_output(f"(binary data, base64): {b64}")
-            return
+        printable_count = None
+        if data.isascii():
+            # быстрый путь для ASCII: печатаемые байты считаем через bytes.translate
+            text = data.decode('ascii')
+            printable_count = len(data.translate(None, _NONPRINTABLE_BYTES))
+        else:
+            # сначала проверяем начало файла: если оно уже не UTF-8, не декодируем весь буфер
+            try:
+                codecs.getincrementaldecoder('utf-8')().decode(data[:_SNIFF_SIZE], final=False)
+                text = data.decode('utf-8')
+            except Exception:
+                # не текст — покажем base64
+                self._write_base64(data)
+                return
 
         # Если декодирование прошло — проверим, является ли текст отображаемым
         # считаем его текстом, если хотя бы 60% символов печатаемы (порог можно настроить)
         if text.strip() == '':
             # строка состоит только из пробелов/управляющих символов — считать нечитабельным
-            b64 = base64.b64encode(data).decode('ascii')
-            self.write_output(f"(binary data, base64): {b64}")
+            self._write_base64(data)
             return
 
-        printable_count = sum(1 for ch in text if ch.isprintable() or ch in '\n\r\t')
+        if printable_count is None:
+            # \n, \r, \t не isprintable — досчитываем их отдельно через str.count
+            printable_count = (sum(map(str.isprintable, text))
+                               + text.count('\n') + text.count('\r') + text.count('\t'))
         ratio = printable_count / max(1, len(text))
         if ratio >= 0.6:
-            # считаем это текстом — выводим построчно
-            for line in text.splitlines():
-                self.write_output(line)
+            # считаем это текстом — выводим целиком одной вставкой, без разбиения на строки
+            if '\r' in text:
+                # \r\n и одиночные \r приводим к \n — Text-виджет понимает только \n
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            self.write_output_block(text if text.endswith('\n') else text + '\n')
         else:
             # большинство — непечатаемые символы, показываем base64
-            b64 = base64.b64encode(data).decode('ascii')
-            self.write_output(f"(binary data, base64): {b64}")
+            self._write_base64(data)
+
+    def _write_base64(self, data: bytes):
+        """Вывести бинарные данные в base64, строками по 76 символов (как в MIME)."""
+        b64 = b64encode_str(data)
+        self.write_output_many(['(binary data, base64):'] + [b64[i:i + 76] for i in range(0, len(b64), 76)])
 
     def cmd_vfsinfo(self, args: List[str]):
         """vfsinfo: показать краткую статистику загруженного VFS."""
         if not self.vfs_root:
             self.write_output("VFS не загружен.")
             return
-        files = 0
-        dirs = 0
-        max_depth = 0
-
-        def walk(node: VFSDirectory, depth: int):
-            nonlocal files, dirs, max_depth
-            dirs += 1
-            if depth > max_depth:
-                max_depth = depth
-            for child in node.children.values():
-                if isinstance(child, VFSDirectory):
-                    walk(child, depth + 1)
-                else:
-                    files += 1
-
-        walk(self.vfs_root, 0)
-        self.write_output(f"VFS загружен: {self.vfs_path}")
-        self.write_output(f"Директории: {dirs}, Файлы: {files}, Максимальная глубина: {max_depth}")
+        if self._vfs_stats is None:
+            files = 0
+            dirs = 0
+            max_depth = 0
+
+            # обход дерева явным стеком (без рекурсии)
+            stack = [(self.vfs_root, 0)]
+            while stack:
+                node, depth = stack.pop()
+                dirs += 1
+                if depth > max_depth:
+                    max_depth = depth
+                for child in node.children.values():
+                    # иерархия узлов закрыта (VFSDirectory/VFSFile), точная проверка типа дешевле isinstance
+                    if type(child) is VFSDirectory:
+                        stack.append((child, depth + 1))
+                    else:
+                        files += 1
+            self._vfs_stats = (dirs, files, max_depth)
+        dirs, files, max_depth = self._vfs_stats
+        self.write_output_many([
+            f"VFS загружен: {self.vfs_path}",
+            f"Директории: {dirs}, Файлы: {files}, Максимальная глубина: {max_depth}",
+        ])
 
     def cmd_uptime(self, args: List[str]):
         """uptime: показать, как долго работает эмулятор (и, если доступно, системный uptime)."""
@@ -286,15 +388,14 @@ class ShellEmulator(tk.Tk):
         human.append(f"{hours:02d}:{minutes:02d}:{seconds:02d}")
         self.write_output(f"Uptime (эмулятор): {' '.join(human)}")
         try:
-            if os.path.exists('/proc/uptime'):
-                with open('/proc/uptime', 'r') as f:
-                    content = f.read().strip().split()
-                    sys_secs = int(float(content[0]))
-                    d, r = divmod(sys_secs, 86400)
-                    h, r = divmod(r, 3600)
-                    m, s = divmod(r, 60)
-                    sys_human = (f"{d}d " if d else "") + f"{h:02d}:{m:02d}:{s:02d}"
-                    self.write_output(f"Uptime (система): {sys_human}")
+            if self._uptime_fd is not None:
+                content = os.pread(self._uptime_fd, 64, 0).split()
+                sys_secs = int(float(content[0]))
+                d, r = divmod(sys_secs, 86400)
+                h, r = divmod(r, 3600)
+                m, s = divmod(r, 60)
+                sys_human = (f"{d}d " if d else "") + f"{h:02d}:{m:02d}:{s:02d}"
+                self.write_output(f"Uptime (система): {sys_human}")
         except Exception:
             pass
 
@@ -317,7 +418,7 @@ class ShellEmulator(tk.Tk):
         if node is None:
             self.write_output(f"rmdir: путь не найден: {path}")
             return
-        if not isinstance(node, VFSDirectory):
+        if type(node) is not VFSDirectory:
             self.write_output(f"rmdir: {path}: не является директорией")
             return
         # Проверить пустоту
@@ -333,6 +434,10 @@ class ShellEmulator(tk.Tk):
         if not parent_dir.remove_child(name):
             self.write_output(f"rmdir: не удалось удалить {path}")
             return
+        self._vfs_changed()
+        if node is self._cwd_node:
+            # удалили текущую директорию — кэшированный узел больше не в дереве
+            self._cwd_node = None
         self.write_output(f"rmdir: удалено {path}")
 
     def cmd_cp(self, args: List[str]):
@@ -350,43 +455,31 @@ class ShellEmulator(tk.Tk):
         if src_node is None:
             self.write_output(f"cp: источник не найден: {src}")
             return
-        if isinstance(src_node, VFSDirectory):
+        if type(src_node) is VFSDirectory:
             self.write_output(f"cp: копирование директорий не поддерживается: {src}")
             return
         # src_node — VFSFile
-        assert isinstance(src_node, VFSFile)
-        # Если dst существует и это директория — копируем внутрь с тем же именем
-        dst_node = self.vfs_resolve(dst)
-        if dst_node is not None and isinstance(dst_node, VFSDirectory):
+        # Один проход по дереву: сам dst (если есть), его родитель и последнее имя
+        dst_info = resolve_with_parent(self.vfs_root, self.cwd, dst)
+        if dst_info is None:
+            self.write_output(f"cp: родительская директория для {dst} не найдена")
+            return
+        dst_node, dest_parent, dest_name = dst_info
+        if type(dst_node) is VFSDirectory:
+            # dst — существующая директория: копируем внутрь с тем же именем
             dest_parent = dst_node
             dest_name = src_node.name
-        elif dst_node is not None and isinstance(dst_node, VFSFile):
-            # dst указывает на файл — перезаписать его
-            parent_info = resolve_parent(self.vfs_root, self.cwd, dst)
-            if parent_info is None:
-                self.write_output(f"cp: не удалось найти родителя для {dst}")
-                return
-            dest_parent, dest_name = parent_info
-        else:
-            # dst не существует: найти родитель, куда создавать файл
-            parent_info = resolve_parent(self.vfs_root, self.cwd, dst)
-            if parent_info is None:
-                self.write_output(f"cp: родительская директория для {dst} не найдена")
-                return
-            dest_parent, dest_name = parent_info
-        # Проверка dest_parent
-        if not isinstance(dest_parent, VFSDirectory):
-            self.write_output(f"cp: целевая директория недоступна: {dst}")
-            return
-        # Создаём новый файл-узел с копией байтов
-        new_data = bytes(src_node.data)  # копия байтов
+        # иначе dst — существующий файл (перезапишем) или новое имя в dest_parent
+        # Создаём новый файл-узел; bytes неизменяемы, поэтому копировать нужно только bytearray и т.п.
+        new_data = src_node.data if type(src_node.data) is bytes else bytes(src_node.data)
         new_file = VFSFile(dest_name, new_data)
         # Если там уже есть узел с таким именем — если это директория — ошибка, иначе перезапишем
         existing = dest_parent.get_child(dest_name)
-        if existing and isinstance(existing, VFSDirectory):
+        if type(existing) is VFSDirectory:
             self.write_output(f"cp: не могу перезаписать директорию: {dst}")
             return
         dest_parent.add_child(new_file)
+        self._vfs_changed()
         # Вывод успеха
         # отобразим путь в формате, удобном для пользователя
         self.write_output(f"cp: скопировано {src} -> {dst}")
@@ -396,48 +489,70 @@ class ShellEmulator(tk.Tk):
         self.write_output("Выход...")
         self.destroy()
 
+    def destroy(self):
+        """Закрыть окно, остановить стартовый скрипт и освободить дескриптор /proc/uptime."""
+        # после destroy() планировать after() уже нельзя — оставшиеся строки скрипта отбрасываем
+        self._script_queue.clear()
+        # вывод текущей команды (например, «Выход...») — до уничтожения виджета
+        self._flush()
+        if self._uptime_fd is not None:
+            os.close(self._uptime_fd)
+            self._uptime_fd = None
+        super().destroy()
+
     # --- стартовый скрипт (повторно) ---
     def execute_line(self, line: str):
         """Выполнить одну строку скрипта (эмуляция ручного ввода)."""
         line = line.rstrip('\n')
         if not line:
             return
-        self.write_output(f"{self.username}@{self.hostname}:~$ {line}")
-        parts = line.split()
-        if not parts:
-            return
-        cmd = parts[0]
-        args = parts[1:]
-        handler = self.commands.get(cmd)
-        if handler:
-            try:
-                handler(args)
-            except Exception as e:
-                self.write_output(f"Ошибка выполнения команды '{cmd}' в скрипте: {e}")
-        else:
-            self.write_output(f"Неизвестная команда в скрипте: {cmd}. Пропускаю строку.")
+        self._dispatch(line, script=True)
 
     def run_startup_script(self, path: str):
-        """Читать и запускать стартовый скрипт построчно (пропуск комментариев)."""
+        """Запустить стартовый скрипт: чтение файла — в фоновом потоке, выполнение — в потоке GUI."""
+        threading.Thread(target=self._load_script_worker, args=(path,), daemon=True).start()
+        self.after(self.SCRIPT_POLL_MS, self._drain_script_load_q)
+
+    def _load_script_worker(self, path: str):
+        """Фоновый поток: прочитать скрипт и отбросить комментарии/пустые строки.
+        Результат (список строк или исключение) передаётся через очередь — к виджетам поток не обращается.
+        """
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                raw_lines = f.readlines()
+                source = f.read()
         except Exception as e:
-            self.write_output(f"Не удалось открыть стартовый скрипт {path}: {e}")
+            self._script_load_q.put((path, e))
             return
 
-        lines = []
-        for ln in raw_lines:
-            if ln.strip() == '':
-                continue
-            if ln.strip().startswith('#'):
-                continue
-            lines.append(ln.rstrip('\n'))
+        lines = _SCRIPT_LINE_RE.findall(source)
+        self._script_load_q.put((path, lines))
+
+    def _drain_script_load_q(self):
+        """Опрос очереди загрузки скрипта; по готовности — запуск выполнения."""
+        try:
+            path, result = self._script_load_q.get_nowait()
+        except queue.Empty:
+            self.after(self.SCRIPT_POLL_MS, self._drain_script_load_q)
+            return
 
-        if not lines:
+        if isinstance(result, Exception):
+            self.write_output(f"Не удалось открыть стартовый скрипт {path}: {result}")
+            return
+        if not result:
             self.write_output("Стартовый скрипт пуст или содержит только комментарии.")
             return
 
-        delay_ms = 300
-        for i, ln in enumerate(lines):
-            self.after(delay_ms * i, lambda l=ln: self.execute_line(l))
+        self._script_queue.extend(result)
+        self._script_tick()
+
+    def _script_tick(self):
+        """Выполнить очередную строку стартового скрипта и запланировать следующую."""
+        if not self._script_queue:
+            return
+        self.execute_line(self._script_queue.popleft())
+        if self._script_queue:
+            self.after(self.SCRIPT_DELAY_MS, self._script_tick)
+
+
+# таблица команд: имя -> функция ShellEmulator.cmd_<имя> (self передаётся при вызове)
+_HANDLERS = {name: getattr(ShellEmulator, 'cmd_' + name) for name in _COMMAND_NAMES}
@@ -3,7 +3,6 @@
 """
 
 import argparse
-from shell_app import ShellEmulator
 
 
 def parse_args():
@@ -15,5 +14,7 @@ def parse_args():
 
 if __name__ == '__main__':
     args = parse_args()
+    # tkinter (через shell_app) загружаем только после разбора аргументов — --help не поднимает Tcl/Tk
+    from shell_app import ShellEmulator
     app = ShellEmulator(vfs_path=args.vfs_path, startup_script=args.startup_script)
     app.mainloop()
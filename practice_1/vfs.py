@@ -5,43 +5,128 @@
 Вся работа с VFS — только в памяти.
 """
 
+import codecs
 import os
+import sys
 import base64
-import xml.etree.ElementTree as ET
-from typing import Dict, List, Optional, Union
+# lxml (libxml2) разбирает XML заметно быстрее; если не установлен — стандартный ElementTree (expat)
+try:
+    from lxml import etree as ET
+    # внешние сущности и сеть отключаем явно: умолчание resolve_entities зависит от версии lxml
+    # (в старых — True, т.е. SYSTEM-сущность может подтянуть локальный файл). Как и в ElementTree,
+    # внутренние сущности раскрываются, а внешняя — ошибка разбора. Значение 'internal' есть только
+    # в lxml >= 5; в старых версиях отключаем все сущности (внутренние там дают пустой текст).
+    # huge_tree снимает ограничение libxml2 на ~10 МБ текста в узле (большие base64-файлы), как у ElementTree
+    _ITERPARSE_OPTIONS = {'resolve_entities': 'internal' if ET.LXML_VERSION >= (5,) else False,
+                          'no_network': True, 'huge_tree': True}
+except ImportError:
+    import xml.etree.ElementTree as ET
+    _ITERPARSE_OPTIONS = {}
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+# pybase64 (SIMD) заметно быстрее стандартного base64 на средних и больших данных;
+# на коротких строках выигрыша нет, там остаётся стандартный модуль
+try:
+    import pybase64 as _fast_b64
+except ImportError:
+    _fast_b64 = None
+_FAST_B64_MIN_LEN = 64
 
 
 class VFSNode:
     """Базовый узел VFS."""
+    # __slots__ у всех узлов: без __dict__ на каждый экземпляр дерево занимает заметно меньше памяти
+    __slots__ = ('name',)
+
     def __init__(self, name: str):
-        self.name = name
+        # имена интернируются: ключи словарей каталогов и компоненты путей (normalize_path) —
+        # одни и те же объекты строк, поиск в dict сравнивает их по указателю
+        self.name = sys.intern(name)
 
 
 class VFSDirectory(VFSNode):
     """Каталог VFS — содержит дочерние узлы в словаре name -> node."""
+    __slots__ = ('children', '_listing')
+
     def __init__(self, name: str):
         super().__init__(name)
         self.children: Dict[str, VFSNode] = {}
+        self._listing: Optional[str] = None
 
     def add_child(self, node: VFSNode):
+        # ключ — интернированное имя узла
         self.children[node.name] = node
+        self._listing = None
 
     def get_child(self, name: str) -> Optional[VFSNode]:
         return self.children.get(name)
 
     def remove_child(self, name: str) -> bool:
         """Удалить дочерний узел по имени. Возвращает True если удалено, False если нет."""
-        if name in self.children:
-            del self.children[name]
-            return True
-        return False
+        # проверка и удаление — одна операция со словарём
+        if self.children.pop(name, None) is None:
+            return False
+        self._listing = None
+        return True
+
+    def listing(self) -> str:
+        """Отсортированные имена детей через два пробела (у директорий — '/' в конце).
+        Строка кэшируется до следующего add_child/remove_child.
+        """
+        if self._listing is None:
+            children = self.children
+            self._listing = '  '.join(name + ('/' if type(children[name]) is VFSDirectory else '')
+                                      for name in sorted(children))
+        return self._listing
 
 
 class VFSFile(VFSNode):
-    """Файл VFS — хранит содержимое."""
+    """Файл VFS — хранит содержимое.
+    Файлы из XML хранят исходный текст и декодируются при первом обращении к data (см. from_xml_text).
+    """
+    __slots__ = ('_data', '_raw', '_enc')
+
     def __init__(self, name: str, data: bytes):
         super().__init__(name)
-        self.data = data
+        self._data: Optional[bytes] = data
+        self._raw: Optional[str] = None
+        self._enc: Optional[str] = None
+
+    @classmethod
+    def from_xml_text(cls, name: str, raw_text: str, enc: Optional[str]) -> 'VFSFile':
+        """Файл с отложенным декодированием текста из XML (enc — 'base64', имя кодировки или None)."""
+        node = cls(name, b'')
+        # _data = None — признак «ещё не декодирован»; выставляется только здесь, вместе с _raw
+        node._data = None
+        node._raw = raw_text
+        node._enc = enc
+        return node
+
+    @property
+    def data(self) -> bytes:
+        if self._data is None:
+            self._data = _decode_file_text(self.name, self._raw, self._enc)
+            self._raw = None
+        return self._data
+
+
+def _decode_file_text(name: str, raw_text: str, enc: Optional[str]) -> bytes:
+    """Превратить текст <file> из XML в байты. Бросает ValueError при ошибке base64/кодировки."""
+    if enc and enc.lower() == 'base64':
+        try:
+            return b64decode(raw_text)
+        except Exception as e:
+            raise ValueError(f"Ошибка base64 в файле {name}: {e}")
+    if enc:
+        try:
+            return raw_text.encode(enc)
+        except Exception as e:
+            raise ValueError(f"Неверная кодировка '{enc}' для файла {name}: {e}")
+    return raw_text.encode('utf-8')
+
+
+# теги формата VFS в обычном (нижнем) регистре
+_KNOWN_TAGS = frozenset(('vfs', 'dir', 'file'))
 
 
 def load_vfs_from_xml(path: str) -> VFSDirectory:
@@ -49,95 +134,135 @@ def load_vfs_from_xml(path: str) -> VFSDirectory:
     Загружает VFS из XML-файла и возвращает корневой каталог (VFSDirectory).
     Бросает исключения при ошибках (FileNotFoundError, ValueError при некорректном XML).
     Ожидаемый формат описан ранее.
+    XML читается потоково (iterparse): узлы VFS создаются по событиям start/end, а разобранные
+    элементы сразу очищаются, так что полное DOM-дерево в памяти не держится.
     """
     if not os.path.isfile(path):
         raise FileNotFoundError(f"VFS файл не найден: {path}")
-    try:
-        tree = ET.parse(path)
-    except ET.ParseError as e:
-        raise ValueError(f"Ошибка разбора XML VFS: {e}")
-    root = tree.getroot()
-    if root.tag.lower() != 'vfs':
-        raise ValueError("Неверный формат VFS: корневой элемент должен быть <vfs>")
 
     vfs_root = VFSDirectory('/')
-
-    def process_dir(xml_elem: ET.Element, dir_node: VFSDirectory):
-        for child in xml_elem:
-            tag = child.tag.lower()
-            if tag == 'dir':
-                name = child.get('name')
+    # Стек открытых XML-элементов: пары (элемент, каталог VFS). Для <dir> (и корня <vfs>) —
+    # соответствующий каталог, для остальных — None (их дочерние элементы не обрабатываются, как и раньше)
+    stack: List[Tuple[object, Optional[VFSDirectory]]] = []
+    # часто вызываемые в цикле функции — в локальные имена (без поиска атрибутов на каждый элемент)
+    push = stack.append
+    pop = stack.pop
+    new_file = VFSFile.from_xml_text
+    try:
+        for event, elem in ET.iterparse(path, events=('start', 'end'), **_ITERPARSE_OPTIONS):
+            tag = elem.tag
+            if tag not in _KNOWN_TAGS:
+                # теги регистронезависимы; lower() нужен только для нестандартного написания
+                tag = tag.lower()
+            if event == 'start':
+                if not stack:
+                    if tag != 'vfs':
+                        raise ValueError("Неверный формат VFS: корневой элемент должен быть <vfs>")
+                    push((elem, vfs_root))
+                    continue
+                parent = stack[-1][1]
+                if parent is None or tag != 'dir':
+                    # <file> обрабатывается на событии end (нужен его текст), неизвестные теги игнорируем
+                    push((elem, None))
+                    continue
+                name = elem.get('name')
                 if not name:
                     raise ValueError("В VFS: тег <dir> без атрибута name")
+                if name == '/' and len(stack) == 1:
+                    # <dir name="/"> внутри <vfs> — его содержимое и есть корень
+                    push((elem, vfs_root))
+                    continue
                 new_dir = VFSDirectory(name)
-                dir_node.add_child(new_dir)
-                process_dir(child, new_dir)
-            elif tag == 'file':
-                name = child.get('name')
+                # узлы кладём прямо в словарь children (ключ — интернированное имя узла):
+                # каталог только что создан, кэш listing() пуст
+                parent.children[new_dir.name] = new_dir
+                push((elem, new_dir))
+                continue
+
+            # event == 'end'
+            pop()
+            if not stack:
+                continue
+            parent_elem, parent = stack[-1]
+            if tag == 'file' and parent is not None:
+                name = elem.get('name')
                 if not name:
                     raise ValueError("В VFS: тег <file> без атрибута name")
-                enc = child.get('encoding')  # 'base64' или 'utf-8' и т.п.
-                raw_text = child.text or ''
-                if enc and enc.lower() == 'base64':
+                enc = elem.get('encoding')  # 'base64' или 'utf-8' и т.п.
+                if enc and enc.lower() != 'base64':
+                    # имя кодировки проверяем сразу, само содержимое декодируется при первом чтении
                     try:
-                        data = base64.b64decode(raw_text)
-                    except Exception as e:
-                        raise ValueError(f"Ошибка base64 в файле {name}: {e}")
-                else:
-                    if enc:
-                        try:
-                            data = raw_text.encode(enc)
-                        except Exception as e:
-                            raise ValueError(f"Неверная кодировка '{enc}' для файла {name}: {e}")
-                    else:
-                        data = raw_text.encode('utf-8')
-                file_node = VFSFile(name, data)
-                dir_node.add_child(file_node)
-            else:
-                # неизвестные теги игнорируем
-                continue
-
-    # Если внутри <vfs> есть <dir name="/"> — используем его содержимое как корень
-    top_dirs = [c for c in root if c.tag.lower() == 'dir' and c.get('name') == '/']
-    if top_dirs:
-        process_dir(top_dirs[0], vfs_root)
-    else:
-        process_dir(root, vfs_root)
+                        codecs.lookup(enc)
+                    except LookupError as e:
+                        raise ValueError(f"Неверная кодировка '{enc}' для файла {name}: {e}")
+                file_node = new_file(name, elem.text or '', enc)
+                parent.children[file_node.name] = file_node
+            # элемент обработан — отцепляем его (и уже обработанных соседей) от родителя,
+            # чтобы в памяти оставались только открытые элементы, а не пустые «оболочки»
+            elem.clear()
+            del parent_elem[:]
+    except ET.ParseError as e:
+        raise ValueError(f"Ошибка разбора XML VFS: {e}")
 
     return vfs_root
 
 
-# ---------- функции работы с путями ----------
-def split_path(path: str) -> List[str]:
-    """Разбивает Unix-стиль путь на компоненты, убирая пустые и точечные элементы."""
-    return [p for p in path.split('/') if p not in ('', '.')]
+def b64decode(text: str) -> bytes:
+    """Декодировать base64 (пробелы и переводы строк внутри текста игнорируются)."""
+    if _fast_b64 is not None and len(text) >= _FAST_B64_MIN_LEN:
+        return _fast_b64.b64decode(text, validate=False)
+    return base64.b64decode(text)
+
 
+def b64encode_str(data: bytes) -> str:
+    """Закодировать байты в base64 и вернуть ASCII-строку."""
+    if _fast_b64 is not None and len(data) >= _FAST_B64_MIN_LEN:
+        return _fast_b64.b64encode_as_string(data)
+    return base64.b64encode(data).decode('ascii')
 
-def resolve_path(root: VFSDirectory, cwd: List[str], path: str) -> Optional[Union[VFSDirectory, VFSFile]]:
+
+# ---------- функции работы с путями ----------
+# Иерархия узлов закрыта (VFSDirectory/VFSFile без подклассов), поэтому каталог проверяется
+# точным сравнением type(node) is VFSDirectory — дешевле isinstance в циклах спуска по дереву.
+def normalize_path(cwd: Sequence[str], path: str) -> List[str]:
     """
-    Разрешает путь относительно текущей директории cwd (список компонентов от корня).
-    Возвращает VFSNode или None, если путь не найден.
-    Поддерживает абсолютные и относительные пути, '.' и '..'.
+    Приводит путь к списку компонентов от корня за один проход: абсолютный путь
+    начинается от корня, относительный — от cwd; '.' отбрасывается, '..' поднимается на уровень
+    (выше корня подняться нельзя).
     """
-    if path.startswith('/'):
-        comps = split_path(path)
-    else:
-        comps = list(cwd) + split_path(path)
-
-    # Нормализация с обработкой '..'
-    stack: List[str] = []
-    for c in comps:
+    stack: List[str] = [] if path.startswith('/') else list(cwd)
+    # разбиение и нормализация в одном цикле, без промежуточного списка компонентов;
+    # компоненты интернируются — cwd и ключи словарей каталогов делят одни и те же строки
+    intern = sys.intern
+    for c in path.split('/'):
+        if not c or c == '.':
+            continue
         if c == '..':
             if stack:
                 stack.pop()
-        elif c == '.':
-            continue
         else:
-            stack.append(c)
+            stack.append(intern(c))
+    return stack
+
+
+def resolve_path(root: VFSDirectory, cwd: Sequence[str], path: str,
+                 cache: Optional[Dict[Tuple[str, ...], VFSNode]] = None) -> Optional[Union[VFSDirectory, VFSFile]]:
+    """
+    Разрешает путь относительно текущей директории cwd (компоненты от корня: список или кортеж).
+    Возвращает VFSNode или None, если путь не найден.
+    Поддерживает абсолютные и относительные пути, '.' и '..'.
+    cache — необязательный словарь «нормализованный путь (кортеж) -> узел». В него попадают
+    найденный узел и все его предки, поэтому соседние пути спускаются от закэшированного родителя.
+    Очищать его должен владелец при изменении дерева.
+    """
+    stack = normalize_path(cwd, path)
+
+    if cache is not None:
+        return _resolve_cached(root, tuple(stack), cache)
 
     node: VFSNode = root
     for comp in stack:
-        if not isinstance(node, VFSDirectory):
+        if type(node) is not VFSDirectory:
             return None
         node = node.get_child(comp)
         if node is None:
@@ -145,7 +270,31 @@ def resolve_path(root: VFSDirectory, cwd: List[str], path: str) -> Optional[Unio
     return node
 
 
-def resolve_parent(root: VFSDirectory, cwd: List[str], path: str) -> Optional[tuple]:
+def _resolve_cached(root: VFSDirectory, key: Tuple[str, ...],
+                    cache: Dict[Tuple[str, ...], VFSNode]) -> Optional[VFSNode]:
+    """Спуск по нормализованному пути key с использованием и пополнением cache."""
+    if not key:
+        return root
+    node = cache.get(key)
+    if node is not None:
+        return node
+    # начинаем с закэшированного родителя, если он есть, иначе — от корня
+    depth = len(key) - 1
+    node = cache.get(key[:-1]) if depth else root
+    if node is None:
+        node = root
+        depth = 0
+    for i in range(depth, len(key)):
+        if type(node) is not VFSDirectory:
+            return None
+        node = node.get_child(key[i])
+        if node is None:
+            return None
+        cache[key[:i + 1]] = node
+    return node
+
+
+def resolve_parent(root: VFSDirectory, cwd: Sequence[str], path: str) -> Optional[tuple]:
     """
     Разрешает путь и возвращает (parent_dir, name) для указанного path.
     parent_dir — VFSDirectory (куда должен находиться элемент),
@@ -157,33 +306,40 @@ def resolve_parent(root: VFSDirectory, cwd: List[str], path: str) -> Optional[tu
     """
     if path == '/':
         return None
-    # Разделим путь на компоненты
-    if path.startswith('/'):
-        comps = split_path(path)
-    else:
-        comps = list(cwd) + split_path(path)
-    if not comps:
+    stack = normalize_path(cwd, path)
+    if not stack:
         return (root, '')  # special case корень (не используется)
-    parent_comps = comps[:-1]
-    name = comps[-1]
-    # Нормализация parent_comps (обработка .. и .)
-    stack: List[str] = []
-    for c in parent_comps:
-        if c == '..':
-            if stack:
-                stack.pop()
-        elif c == '.':
-            continue
-        else:
-            stack.append(c)
+    name = stack.pop()
     # Пройдём от корня по stack
     node: VFSNode = root
     for comp in stack:
-        if not isinstance(node, VFSDirectory):
+        if type(node) is not VFSDirectory:
             return None
         node = node.get_child(comp)
         if node is None:
             return None
-    if not isinstance(node, VFSDirectory):
+    if type(node) is not VFSDirectory:
         return None
-    return (node, name)
\ No newline at end of file
+    return (node, name)
+
+
+def resolve_with_parent(root: VFSDirectory, cwd: Sequence[str], path: str) -> Optional[Tuple[Optional[VFSNode], Optional[VFSDirectory], str]]:
+    """
+    Разрешает путь за один проход по дереву и возвращает (node, parent_dir, name):
+    node — найденный узел или None, если последнего компонента нет;
+    parent_dir — директория, в которой находится (или должен быть создан) узел;
+    name — имя последнего компонента пути.
+    Для корня возвращает (root, None, '').
+    Возвращает None, если родитель не найден или не является директорией.
+    """
+    stack = normalize_path(cwd, path)
+    if not stack:
+        return (root, None, '')
+
+    parent: VFSNode = root
+    for comp in stack[:-1]:
+        parent = parent.get_child(comp)
+        if type(parent) is not VFSDirectory:
+            return None
+    name = stack[-1]
+    return (parent.get_child(name), parent, name)
@@ -1,7 +1,5 @@
 import argparse
 import sys
-from .config import Config
-from .errors import ConfigError
 
 def build_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
@@ -38,6 +36,10 @@ def build_parser() -> argparse.ArgumentParser:
 def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
+    # Конфигурация и валидаторы импортируются только после разбора аргументов:
+    # --help и ошибки argparse не платят за их загрузку
+    from .config import Config
+    from .errors import ConfigError
 
     try:
         cfg = Config.from_args(args)
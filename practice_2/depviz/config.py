@@ -1,4 +1,4 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from typing import Optional
 from .validators import (
     validate_package_name,
@@ -24,31 +24,35 @@ class Config:
     @classmethod
     def from_args(cls, args: "argparse.Namespace") -> "Config":
         # Валидируем последовательно, чтобы демонстрировать ошибки для каждого поля
-        pkg = validate_package_name(args.package)
-        mode = validate_repo_mode(args.repo_mode)
-        repo = validate_repo(args.repo, mode)
-        ver = validate_version(args.version)
-        out = validate_output_filename(args.output)
-        depth = validate_max_depth(args.max_depth)
-        flt = validate_filter_substring(args.filter)
-        return cls(
-            package=pkg,
-            repo=repo,
-            repo_mode=mode,
-            version=ver,
-            output=out,
-            max_depth=depth,
-            filter_substring=flt,
-        )
+        values: dict = {}
+        for field, attr, validate, deps in _PIPELINE:
+            values[field] = validate(getattr(args, attr), *[values[d] for d in deps])
+        return cls(**values)
 
     def to_kv_lines(self) -> list[str]:
         # Выгрузить только настраиваемые поля в формате ключ=значение
-        data = asdict(self)
-        # Чёткий порядок вывода
-        order = ["package", "version", "repo_mode", "repo", "output", "max_depth", "filter_substring"]
-        lines = []
-        for key in order:
-            val = data.get(key)
-            # None выводим как пустую строку для консистентности
-            lines.append(f"{key}={'' if val is None else val}")
-        return lines
+        # Чёткий порядок вывода; Config плоский — атрибуты читаем напрямую, без asdict()
+        fields = (
+            ("package", self.package),
+            ("version", self.version),
+            ("repo_mode", self.repo_mode),
+            ("repo", self.repo),
+            ("output", self.output),
+            ("max_depth", self.max_depth),
+            ("filter_substring", self.filter_substring),
+        )
+        # None выводим как пустую строку для консистентности
+        return [f"{key}={'' if val is None else val}" for key, val in fields]
+
+
+# Конвейер валидации: (поле Config, атрибут argparse, валидатор, уже проверенные поля —
+# дополнительные аргументы валидатора). Порядок задаёт порядок проверок и первую ошибку.
+_PIPELINE = (
+    ("package", "package", validate_package_name, ()),
+    ("repo_mode", "repo_mode", validate_repo_mode, ()),
+    ("repo", "repo", validate_repo, ("repo_mode",)),
+    ("version", "version", validate_version, ()),
+    ("output", "output", validate_output_filename, ()),
+    ("max_depth", "max_depth", validate_max_depth, ()),
+    ("filter_substring", "filter", validate_filter_substring, ()),
+)
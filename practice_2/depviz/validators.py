@@ -1,6 +1,6 @@
 import os
 import re
-from urllib.parse import urlparse
+import stat
 from .errors import ConfigError
 
 _PKG_RE = re.compile(r"^[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?$")
@@ -12,7 +12,11 @@ _VER_RE = re.compile(
     r"(?:\.dev\d+)?\s*$",
     re.IGNORECASE,
 )
-_ALLOWED_IMAGE_EXT = {".png", ".jpg", ".jpeg", ".svg", ".pdf"}
+_ALLOWED_IMAGE_EXT = frozenset((".png", ".jpg", ".jpeg", ".svg", ".pdf"))
+# error message lists are built once, not on every failed check
+_ALLOWED_IMAGE_EXT_TEXT = ", ".join(sorted(_ALLOWED_IMAGE_EXT))
+_REPO_MODES = ("path", "url")
+_REPO_MODES_TEXT = ", ".join(_REPO_MODES)
 
 def validate_package_name(name: str) -> str:
     if not name:
@@ -25,22 +29,27 @@ def validate_package_name(name: str) -> str:
     return name
 
 def validate_repo_mode(mode: str) -> str:
-    allowed = {"url", "path"}
-    if mode not in allowed:
-        raise ConfigError("repo_mode", f"unknown repository mode: {mode!r}. Allowed: {', '.join(sorted(allowed))}")
+    # only two modes: a tuple membership test is cheaper than building and hashing a set
+    if mode not in _REPO_MODES:
+        raise ConfigError("repo_mode", f"unknown repository mode: {mode!r}. Allowed: {_REPO_MODES_TEXT}")
     return mode
 
 def validate_repo(repo: str, mode: str) -> str:
     if not repo:
         raise ConfigError("repo", "repository URL/path is required")
     if mode == "url":
+        # urllib.parse is only needed in url mode; import it on demand
+        from urllib.parse import urlparse
         pr = urlparse(repo)
         if pr.scheme not in {"http", "https"} or not pr.netloc:
             raise ConfigError("repo", "for 'url' mode, expected an address like https://host/...")
     elif mode == "path":
-        if not os.path.exists(repo):
+        # one stat call instead of separate exists/isfile/isdir checks
+        try:
+            mode_bits = os.stat(repo).st_mode
+        except (OSError, ValueError):
             raise ConfigError("repo", f"path not found: {repo}")
-        if not os.path.isfile(repo) and not os.path.isdir(repo):
+        if not stat.S_ISREG(mode_bits) and not stat.S_ISDIR(mode_bits):
             raise ConfigError("repo", f"expected a file or directory, got: {repo}")
         if not os.access(repo, os.R_OK):
             raise ConfigError("repo", f"no read permission for: {repo}")
@@ -58,7 +67,7 @@ def validate_output_filename(filename: str) -> str:
         raise ConfigError("output", "output image filename must not be empty")
     root, ext = os.path.splitext(filename)
     if not ext or ext.lower() not in _ALLOWED_IMAGE_EXT:
-        raise ConfigError("output", f"extension {ext or '(none)'} is not supported. Allowed: {', '.join(sorted(_ALLOWED_IMAGE_EXT))}")
+        raise ConfigError("output", f"extension {ext or '(none)'} is not supported. Allowed: {_ALLOWED_IMAGE_EXT_TEXT}")
     parent = os.path.dirname(os.path.abspath(filename)) or "."
     if not os.path.exists(parent):
         raise ConfigError("output", f"directory does not exist: {parent}")